@@ -1,18 +1,47 @@
 import io
 import os
 import re
+import time
+import hashlib
 import logging
+import threading
+import unicodedata
+import zipfile
+from functools import lru_cache
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import requests
-import qrcode
-from flask import Flask, request, send_file, jsonify
+import segno
+from cachetools import LRUCache, TTLCache, cached
+from cachetools.keys import hashkey
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, Response, request, send_file, jsonify
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import Paragraph, Frame
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from PyPDF2 import PdfReader, PdfWriter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+import pikepdf
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON via orjson: sorted keys, compact, faster encode/decode.
+
+    Unlike Flask's provider, datetimes come out as RFC 3339 rather than HTTP
+    dates, and non-ASCII text is written as UTF-8 rather than \\u-escaped.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # --- Config & Debug Mode ---
 DEBUG_MODE = os.getenv("DEBUG_LOGS", "false").lower() == "true"
@@ -21,15 +50,52 @@ logging.basicConfig(level=logging.DEBUG if DEBUG_MODE else logging.INFO)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+
+def check_config():
+    """Raise at boot (see gunicorn.conf.py) instead of on every request."""
+    missing = [name for name, value in (
+        ("SUPABASE_URL", SUPABASE_URL),
+        ("SUPABASE_SERVICE_ROLE_KEY", SUPABASE_KEY),
+    ) if not value]
+    if missing:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
+
+
 HEADERS = {
     "apikey": SUPABASE_KEY,
     "Authorization": f"Bearer {SUPABASE_KEY}",
     "Content-Type": "application/json"
 }
 
+# --- Shared HTTP session (keep-alive pool for Supabase) ---
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+SUPABASE_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# --- Property row cache (rows rarely change; skip repeat round-trips) ---
+PROPERTY_CACHE = TTLCache(
+    maxsize=int(os.getenv("PROPERTY_CACHE_SIZE", 1024)),
+    ttl=int(os.getenv("PROPERTY_CACHE_TTL", 300)),
+)
+PROPERTY_CACHE_LOCK = threading.Lock()
+
+# --- Background work (QR prefetch) ---
+# e.g. "https://app.applyfastnow.com/p/{property_id}"; unset disables prefetch.
+QR_URL_TEMPLATE = os.getenv("QR_URL_TEMPLATE")
+EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("BACKGROUND_THREADS", 4)))
+
 # --- Template path ---
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "vss-template-flat-2.pdf")
 
+# Read once at import; each request opens its own copy since the overlay mutates the page.
+with open(TEMPLATE_PATH, "rb") as f:
+    TEMPLATE_BYTES = f.read()
+
 # --- Page size ---
 PAGE_W, PAGE_H = letter  # 612 x 792
 
@@ -49,9 +115,31 @@ Y_NAME = 92   # property name unchanged
 Y_CODE = 260  # property code baseline (raised)
 CODE_FRAME_HEIGHT = 240
 CODE_FRAME_Y = Y_CODE - (CODE_FRAME_HEIGHT - 48)
+NAME_X = PAGE_W / 2.0
+
+# --- Text styles ---
+CODE_FONT = "Helvetica"
+CODE_FONT_SIZE = 24
+CODE_LEADING = 28
+CODE_PADDING = 6  # same inset a platypus Frame used to apply
+CODE_TEXT_WIDTH = CODE_FRAME_WIDTH - 2 * CODE_PADDING
+CODE_CENTER_X = BLUE_X_LEFT + CODE_FRAME_WIDTH / 2.0
+CODE_FIRST_BASELINE = CODE_FRAME_Y + CODE_FRAME_HEIGHT - CODE_PADDING - CODE_FONT_SIZE
+CODE_MAX_LINES = int((CODE_FRAME_HEIGHT - 2 * CODE_PADDING) // CODE_LEADING)
+NAME_FONT = "Helvetica-Bold"
+NAME_FONT_SIZE = 18
+CODE_FONT_RES = b"/FCode"  # page /Font resource names for the overlay text
+NAME_FONT_RES = b"/FName"
+
+# Load font metrics at import so the first request doesn't pay for it.
+for _font in (CODE_FONT, NAME_FONT):
+    stringWidth("warmup", _font, 12)
 
 # QR code placement (unchanged)
 QR_SIZE = 200
+QR_BORDER = 2  # quiet-zone modules
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", 1024))  # URLs; each entry is a few KB of ops
+DARK_RUN = re.compile(rb"\x01+")  # consecutive dark modules in a matrix row
 QR_TOP_GAP = 12
 QR_CENTER_X = (SCAN_X0 + SCAN_X1) / 2.0
 QR_X = QR_CENTER_X - (QR_SIZE / 2.0)
@@ -59,6 +147,11 @@ QR_Y = (SCAN_Y0 - QR_TOP_GAP) - QR_SIZE
 QR_X = max(0, min(QR_X, PAGE_W - QR_SIZE))
 QR_Y = max(0, min(QR_Y, PAGE_H - QR_SIZE))
 
+# --- Rendered PDF cache (finished PDFs are ~370 KB; sized per worker) ---
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", 64))
+PDF_MAX_AGE = int(os.getenv("PDF_MAX_AGE", 3600))  # browser cache lifetime, seconds
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 100))  # ids travel in the query string
+
 
 # --- 🔧 Safe text cleanup helper ---
 def sanitize(text: str) -> str:
@@ -70,124 +163,383 @@ def sanitize(text: str) -> str:
 
 
 # --- Helpers ---
+def wrap_text(text: str, font: str, size: float, max_width: float) -> list:
+    """Greedy word wrap. Each word is measured once (widths are additive)."""
+    text = " ".join(text.split())
+    if stringWidth(text, font, size) <= max_width:
+        return [text] if text else []  # common case: the whole code fits on one line
+
+    space_w = stringWidth(" ", font, size)
+    lines, line, line_w = [], [], 0.0
+    for word in text.split(" "):
+        word_w = stringWidth(word, font, size)
+        if word_w > max_width:
+            # Too wide for any line: fill the rest of this one, then break by characters.
+            room = max_width - line_w - space_w if line else max_width
+            first, *rest = split_word(word, font, size, max_width, room)
+            if first:
+                line.append(first)
+            for piece in rest:
+                if line:
+                    lines.append(" ".join(line))
+                line = [piece]
+            line_w = stringWidth(" ".join(line), font, size)
+            continue
+        if line and line_w + space_w + word_w <= max_width:
+            line.append(word)
+            line_w += space_w + word_w
+            continue
+        if line:
+            lines.append(" ".join(line))
+        line, line_w = [word], word_w
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def split_word(word: str, font: str, size: float, max_width: float, first_width: float) -> list:
+    """Break a word into character runs fitting max_width; the first fits first_width and may be ""."""
+    pieces, piece, piece_w, width = [], "", 0.0, first_width
+    for char in word:
+        char_w = stringWidth(char, font, size)
+        if piece_w + char_w > width and (piece or width < max_width):
+            pieces.append(piece)
+            piece, piece_w, width = "", 0.0, max_width
+        piece += char
+        piece_w += char_w
+    pieces.append(piece)
+    return pieces
+
+
+def property_key(property_id) -> str:
+    """Cache/match key for an id, folded the way PostgREST's cast compares (uuid case, int zeros)."""
+    key = str(property_id).strip().lower()
+    return str(int(key)) if key.isdigit() else key
+
+
+def postgrest_quote(value: str) -> str:
+    """Double-quote a value for a PostgREST `in.()` list."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def fetch_property_rows(property_ids: list) -> dict:
+    """Rows keyed by the caller's str(id): cached ones first, the rest in a single `in.()` query."""
+    keys = {str(property_id): property_key(property_id) for property_id in property_ids}
+    by_key = {}
+    with PROPERTY_CACHE_LOCK:
+        for key in set(keys.values()):
+            row = PROPERTY_CACHE.get(key)
+            if row is not None:
+                by_key[key] = row
+    missing = {key: property_id for property_id, key in keys.items() if key not in by_key}
+
+    if missing:
+        url = f"{SUPABASE_URL}/rest/v1/properties"
+        quoted = ",".join(postgrest_quote(property_id) for property_id in missing.values())
+        params = {
+            "id": f"in.({quoted})",
+            "select": "id,code,property_name,qr_url"
+        }
+        resp = SESSION.get(url, params=params, timeout=SUPABASE_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        if len(missing) == 1 and len(data) == 1:
+            # PostgREST matched it with its own cast; trust that over our key folding.
+            fetched = {next(iter(missing)): data[0]}
+        else:
+            fetched = {property_key(row["id"]): row for row in data}
+        with PROPERTY_CACHE_LOCK:
+            PROPERTY_CACHE.update(fetched)
+        by_key.update(fetched)
+
+    return {property_id: by_key[key] for property_id, key in keys.items() if key in by_key}
+
+
 def fetch_property_row(property_id: str) -> dict:
-    url = f"{SUPABASE_URL}/rest/v1/properties"
-    params = {
-        "id": f"eq.{property_id}",
-        "select": "id,code,property_name,qr_url"
-    }
-    resp = requests.get(url, headers=HEADERS, params=params)
-    resp.raise_for_status()
-    data = resp.json()
-    if not data:
+    row = fetch_property_rows([property_id]).get(str(property_id))
+    if row is None:
         raise ValueError("Property not found")
-    return data[0]
+    return row
+
+
+def qr_matrix(data: str) -> tuple:
+    """QR module rows (1 = dark), quiet zone included."""
+    qr = segno.make_qr(data, error="m")  # make_qr: never emit a Micro QR
+    return tuple(bytes(row) for row in qr.matrix_iter(border=QR_BORDER))
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_ops(data: str, x: float, y: float, size: float) -> bytes:
+    """Content-stream ops filling the QR as one path, one rect per run of dark modules. Cached."""
+    matrix = qr_matrix(data)
+    n = len(matrix)
+    s = size / n
+
+    ops = [b"1 g %.3f %.3f %.3f %.3f re f 0 g" % (x, y, size, size)]  # white quiet zone
+    for i, row in enumerate(matrix):
+        row_y = y + (n - i - 1) * s
+        for run in DARK_RUN.finditer(row):
+            ops.append(b"%.3f %.3f %.3f %.3f re" % (x + run.start() * s, row_y, (run.end() - run.start()) * s, s))
+    ops.append(b"f\n")
+    return b"\n".join(ops)
+
+
+def pdf_string(text: str) -> bytes:
+    """Encode text as a PDF literal string for a WinAnsi standard font."""
+    raw = text.encode("cp1252", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def centred_text_ops(font_res: bytes, font: str, size: float, cx: float, y: float, text: str) -> bytes:
+    """BT..ET block drawing text centred on cx (what drawCentredString emitted)."""
+    x = cx - stringWidth(text, font, size) / 2.0
+    return b"BT %s %d Tf %.3f %.3f Td %s Tj ET\n" % (font_res, size, x, y, pdf_string(text))
+
+
+def prefetch_qr(property_id: str):
+    """Start encoding the predicted QR while the Supabase fetch is in flight: (url, future) or None."""
+    if not QR_URL_TEMPLATE:
+        return None
+    qr_url = QR_URL_TEMPLATE.format(property_id=property_id)
+    # Uncached: the id isn't known to exist yet, so the result must not land in qr_ops' LRU.
+    return qr_url, EXECUTOR.submit(qr_ops.__wrapped__, qr_url, QR_X, QR_Y, QR_SIZE)
+
+
+def fetch_property_row_with_qr(property_id: str) -> tuple:
+    """(row, QR ops or None). Prefetches the QR only when the row has to come from Supabase."""
+    with PROPERTY_CACHE_LOCK:
+        row = PROPERTY_CACHE.get(property_key(property_id))
+    if row is not None:
+        return row, None  # nothing to overlap; qr_ops is cached or computed in line
+    prefetch = prefetch_qr(property_id)
+    row = fetch_property_row(property_id)
+    if prefetch is None or row["qr_url"] != prefetch[0]:
+        return row, None  # wrong guess: encoding in line beats waiting on the pool
+    return row, prefetch[1].result()
+
+
+def clean_fields(property_row: dict) -> tuple:
+    """(code, name, qr_url) as they are drawn on the page."""
+    return (
+        sanitize(property_row.get("code", "")),
+        sanitize(property_row.get("property_name", "")),
+        property_row["qr_url"],
+    )
+
+
+def build_pdf(property_row: dict, qr: bytes = None) -> bytes:
+    return render_pdf(*clean_fields(property_row), qr=qr)
+
+
+def build_batch_pdf(property_rows: list) -> bytes:
+    """One page per property, all sharing a single copy of the template."""
+    return stamp_template([overlay_ops(*clean_fields(row)) for row in property_rows])
+
 
+def build_batch_zip(property_rows: list) -> io.BytesIO:
+    """One PDF per property in a zip; stored, not deflated, since the PDFs are already compressed."""
+    zip_buf = io.BytesIO()
+    written = set()
+    with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_STORED) as zf:
+        for row in property_rows:
+            safe_name = sanitize(row.get("property_name", "property")).lower()
+            member = f"{safe_name}-{row['id']}.pdf"
+            if member in written:  # repeated id in the request
+                continue
+            written.add(member)
+            # Straight to stamp_template so a large batch doesn't evict render_pdf's hot entries.
+            zf.writestr(member, stamp_template([overlay_ops(*clean_fields(row))]))
+    zip_buf.seek(0)
+    return zip_buf
 
-def generate_qr_code(data: str) -> ImageReader:
-    qr = qrcode.QRCode(box_size=10, border=2)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return ImageReader(buf)
 
+def pdf_etag(property_row: dict) -> str:
+    return pdf_digest(*clean_fields(property_row))
 
-def build_pdf(property_row: dict) -> bytes:
-    reader = PdfReader(TEMPLATE_PATH)
-    writer = PdfWriter()
 
-    overlay_buf = io.BytesIO()
-    c = canvas.Canvas(overlay_buf, pagesize=letter)
+@lru_cache(maxsize=PDF_CACHE_SIZE)
+def pdf_digest(code: str, name: str, qr_url: str) -> str:
+    """Content hash of the rendered PDF, so template or layout changes also change it."""
+    return hashlib.blake2b(render_pdf(code, name, qr_url), digest_size=16).hexdigest()
 
-    # --- Clean property name and code ---
-    clean_code = sanitize(property_row.get("code", ""))
-    clean_name = sanitize(property_row.get("property_name", ""))
 
+@cached(
+    LRUCache(maxsize=PDF_CACHE_SIZE),
+    key=lambda code, name, qr_url, qr=None: hashkey(code, name, qr_url),
+    lock=threading.Lock(),
+)
+def render_pdf(code: str, name: str, qr_url: str, qr: bytes = None) -> bytes:
+    """Single-property PDF, cached by (code, name, qr_url). qr: prefetched qr_ops output for qr_url."""
+    return stamp_template([overlay_ops(code, name, qr_url, qr)])
+
+
+def overlay_ops(code: str, name: str, qr_url: str, qr: bytes = None) -> bytes:
+    """Content-stream ops for the code, name and QR of one page."""
     # --- Property Code ---
-    styles = getSampleStyleSheet()
-    code_style = ParagraphStyle(
-        "CodeStyle",
-        parent=styles["Normal"],
-        fontName="Helvetica",
-        fontSize=24,
-        leading=28,
-        alignment=1
-    )
-    para = Paragraph(clean_code, code_style)
-    frame = Frame(BLUE_X_LEFT, CODE_FRAME_Y, CODE_FRAME_WIDTH, CODE_FRAME_HEIGHT, showBoundary=0)
-    frame.addFromList([para], c)
+    ops = [b"q 0 g\n"]
+    y = CODE_FIRST_BASELINE
+    for line in wrap_text(code, CODE_FONT, CODE_FONT_SIZE, CODE_TEXT_WIDTH)[:CODE_MAX_LINES]:
+        ops.append(centred_text_ops(CODE_FONT_RES, CODE_FONT, CODE_FONT_SIZE, CODE_CENTER_X, y, line))
+        y -= CODE_LEADING
 
     # --- Property Name ---
-    c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(PAGE_W / 2.0, Y_NAME, clean_name)
+    ops.append(centred_text_ops(NAME_FONT_RES, NAME_FONT, NAME_FONT_SIZE, NAME_X, Y_NAME, name))
 
     # --- QR Code ---
-    qr_img = generate_qr_code(property_row["qr_url"])
-    c.drawImage(qr_img, QR_X, QR_Y, width=QR_SIZE, height=QR_SIZE, mask="auto")
+    ops.append(qr if qr is not None else qr_ops(qr_url, QR_X, QR_Y, QR_SIZE))
+    ops.append(b"Q\n")
+    return b"".join(ops)
 
-    c.save()
-    overlay_buf.seek(0)
-
-    overlay_pdf = PdfReader(overlay_buf)
-    template_page = reader.pages[0]
-    template_page.merge_page(overlay_pdf.pages[0])
-    writer.add_page(template_page)
 
+def stamp_template(overlays: list) -> bytes:
+    """Append each overlay to its own copy of the template page (no overlay PDF round-trip)."""
+    start = time.perf_counter_ns() if DEBUG_MODE else 0
     out_buf = io.BytesIO()
-    writer.write(out_buf)
-    out_buf.seek(0)
-    return out_buf.getvalue()
+    with pikepdf.open(io.BytesIO(TEMPLATE_BYTES)) as pdf:
+        page = pdf.pages[0]
+        for res_name, font in ((CODE_FONT_RES, CODE_FONT), (NAME_FONT_RES, NAME_FONT)):
+            font_dict = pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.Type1,
+                BaseFont=pikepdf.Name("/" + font),
+                Encoding=pikepdf.Name.WinAnsiEncoding,
+            )
+            page.add_resource(pdf.make_indirect(font_dict), pikepdf.Name.Font, pikepdf.Name(res_name.decode()))
+
+        # Isolate the template's graphics state so each overlay starts from defaults.
+        contents = page.obj.Contents
+        template_streams = list(contents) if isinstance(contents, pikepdf.Array) else [contents]
+        push = pdf.make_stream(b"q\n")
+        for i, ops in enumerate(overlays):
+            page_contents = pikepdf.Array([push, *template_streams, pdf.make_stream(b"Q\n" + ops)])
+            if i == 0:
+                page.obj.Contents = page_contents
+                continue
+            pdf.pages.append(pikepdf.Page(pikepdf.Dictionary(
+                Type=pikepdf.Name.Page,
+                MediaBox=page.MediaBox,
+                Resources=page.Resources,
+                Contents=page_contents,
+            )))
+        # Content-derived /ID (qpdf defaults to a clock-based one) keeps ETags stable
+        # across workers and restarts.
+        pdf.save(out_buf, linearize=False, deterministic_id=True)
+
+    pdf_data = out_buf.getvalue()
+    if DEBUG_MODE:
+        logging.debug(
+            "pdf built in %.2fms pages=%d size=%d sha256=%s",
+            (time.perf_counter_ns() - start) / 1e6,
+            len(overlays),
+            len(pdf_data),
+            hashlib.sha256(pdf_data).hexdigest(),
+        )
+    return pdf_data
 
 
 # --- Routes ---
+def pdf_response(pdf_data: bytes, filename: str, etag: str = None):
+    """Send a PDF inline. With an etag, repeat GETs can be answered with a 304."""
+    # A Response over the bytes themselves: send_file would copy a BytesIO via getbuffer().
+    resp = Response(pdf_data, mimetype="application/pdf")
+    try:
+        filename.encode("ascii")
+        names = {"filename": filename}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+-.^_`|~')}"}
+    resp.headers.set("Content-Disposition", "inline", **names)  # ✅ Inline (open in new tab)
+    if not etag:
+        resp.cache_control.no_cache = True
+        return resp
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = f"private, max-age={PDF_MAX_AGE}"
+    return resp.make_conditional(request, accept_ranges=True, complete_length=len(pdf_data))
+
+
 @app.route("/")
 def health():
     return jsonify({"ok": True})
 
 
+def request_body():
+    """The JSON body as a dict ({} when empty or malformed), or None when it isn't an object."""
+    body = request.get_json(force=True, silent=True) or {}
+    return body if isinstance(body, dict) else None
+
+
+def is_property_id(value) -> bool:
+    """Ids are strings or integers; bools are ints to Python but not ids."""
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+@app.errorhandler(Exception)
+def handle_error(e):
+    """One JSON 500 for every route; HTTP errors (404, 405, ...) pass through unchanged."""
+    if isinstance(e, HTTPException):
+        return e
+    logging.exception("%s %s failed", request.method, request.path)
+    return jsonify({"error": str(e)}), 500
+
+
 @app.route("/generate_pdf", methods=["POST"])
 def generate_pdf():
-    try:
-        body = request.get_json(force=True)
-        property_id = body.get("property_id")
-        if not property_id:
-            return jsonify({"error": "Missing property_id"}), 400
-        row = fetch_property_row(property_id)
-        pdf_bytes = build_pdf(row)
-        return send_file(
-            io.BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=False,  # ✅ Inline (open in new tab)
-            download_name="qr_property.pdf"
-        )
-    except Exception as e:
-        logging.exception("PDF generation failed")
-        return jsonify({"error": str(e)}), 500
+    body = request_body()
+    if body is None:
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    property_id = body.get("property_id")
+    if not property_id:
+        return jsonify({"error": "Missing property_id"}), 400
+    if not is_property_id(property_id):
+        return jsonify({"error": "property_id must be a string or integer"}), 400
+    row, qr = fetch_property_row_with_qr(property_id)
+    return pdf_response(build_pdf(row, qr), "qr_property.pdf", etag=pdf_etag(row))
 
 
 @app.route("/download_pdf/<property_id>", methods=["GET"])
 def download_pdf(property_id):
-    try:
-        row = fetch_property_row(property_id)
-        pdf_bytes = build_pdf(row)
-
-        safe_name = sanitize(row.get("property_name", "property")).lower()
-        filename = f"{safe_name}.pdf"
-
+    row, qr = fetch_property_row_with_qr(property_id)
+    pdf_data = build_pdf(row, qr)
+
+    safe_name = sanitize(row.get("property_name", "property")).lower()
+    filename = f"{safe_name}.pdf"
+
+    return pdf_response(pdf_data, filename, etag=pdf_etag(row))
+
+
+@app.route("/generate_pdfs", methods=["POST"])
+def generate_pdfs():
+    body = request_body()
+    if body is None:
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    property_ids = body.get("property_ids")
+    if not property_ids or not isinstance(property_ids, list):
+        return jsonify({"error": "Missing property_ids"}), 400
+    if not all(is_property_id(property_id) for property_id in property_ids):
+        return jsonify({"error": "property_ids must be strings or integers"}), 400
+    output_format = body.get("format", "pdf")
+    if output_format not in ("pdf", "zip"):
+        return jsonify({"error": "format must be 'pdf' or 'zip'"}), 400
+    if len(property_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} property_ids per request"}), 400
+    rows_by_id = fetch_property_rows(property_ids)
+    missing = [str(property_id) for property_id in property_ids if str(property_id) not in rows_by_id]
+    if missing:
+        return jsonify({"error": f"Property not found: {', '.join(missing)}", "missing": missing}), 404
+    rows = [rows_by_id[str(property_id)] for property_id in property_ids]
+    if output_format == "zip":
         return send_file(
-            io.BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=False,  # ✅ Inline display instead of forced download
-            download_name=filename
+            build_batch_zip(rows),
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name="qr_properties.zip"
         )
-    except Exception as e:
-        logging.exception("PDF download failed")
-        return jsonify({"error": str(e)}), 500
+    return pdf_response(build_batch_pdf(rows), "qr_properties.pdf")
 
 
 # --- Main Entrypoint ---
+# Local development only; production runs `gunicorn -c gunicorn.conf.py app:app` (see Procfile).
 if __name__ == "__main__":
+    check_config()
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 10000)))
\ No newline at end of file
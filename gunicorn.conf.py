@@ -0,0 +1,42 @@
+import os
+
+# --- Bind ---
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+
+# --- Workers ---
+# One process per core: build_pdf is CPU-bound and holds the GIL, so cores
+# are only used in parallel across processes. In a container os.cpu_count()
+# reports the host's cores, so the default counts the cores this process may
+# run on, capped at 4 (a CPU quota is invisible here too). Set WEB_CONCURRENCY
+# to the container's actual CPU share.
+cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+workers = int(os.getenv("WEB_CONCURRENCY", min(cores, 4)))
+
+# Threaded workers: a request waiting on Supabase releases the GIL, so other
+# requests on the same worker keep running instead of queueing behind it.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = 60
+
+# GUNICORN_WORKER_CLASS=gevent swaps threads for greenlets (needs `pip install
+# gevent`); worker_connections then caps in-flight requests per worker.
+if worker_class == "gevent":
+    # Patch ssl/socket/threading before the preloaded app.py imports them.
+    from gevent import monkey
+    monkey.patch_all()
+    # Only gevent gets the lower cap; gthread also reads worker_connections
+    # and should keep gunicorn's default of 1000.
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 100))
+
+# --- Preload ---
+# Import app.py once in the master (template bytes, font metrics) and fork
+# workers from it; nothing opens sockets or threads at import, so this is
+# fork-safe.
+preload_app = True
+
+
+# --- Startup checks ---
+def on_starting(server):
+    # Refuse to boot without Supabase credentials rather than 500 on every request.
+    from app import check_config
+    check_config()